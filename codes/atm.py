@@ -1,47 +1,183 @@
 import csv
+import math
 import os
-import re
-from datetime import datetime
-from typing import Dict, Optional
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from codes.txn_log import FdAppender, UringAppender
 from codes.user import User, CONFIG
 
+ACCT_IDX, TYPE_IDX, AMOUNT_IDX, TARGET_IDX, STATUS_IDX, TIMESTAMP_IDX = 0, 1, 2, 3, 4, 5
+
+def _scan_amount(amount: str) -> float:
+    whole_digits = 0
+    fraction_digits = -1
+    value = 0
+    too_large = False
+    for char in amount:
+        if char == ".":
+            if fraction_digits >= 0:
+                return -1.0
+            fraction_digits = 0
+            continue
+        digit = ord(char) - 48
+        if digit < 0 or digit > 9:
+            return -1.0
+        if fraction_digits >= 0:
+            fraction_digits += 1
+            if fraction_digits > 2:
+                return -1.0
+        else:
+            whole_digits += 1
+        if value < 10 ** 12:
+            value = value * 10 + digit
+        else:
+            too_large = True
+    if whole_digits == 0 or fraction_digits == 0:
+        return -1.0
+    if too_large:
+        return math.inf
+    if fraction_digits < 2:
+        value *= 10 ** (2 - max(fraction_digits, 0))
+    return value / 100
+
+def _split_amount(amount: str) -> float:
+    whole, dot, fraction = amount.partition(".")
+    if not (whole.isascii() and whole.isdigit()):
+        return -1.0
+    if dot and not (0 < len(fraction) <= 2 and fraction.isascii() and fraction.isdigit()):
+        return -1.0
+    return float(amount)
+
+try:
+    from numba import njit
+    _validate_amount = njit(cache=True)(_scan_amount)
+except ImportError:
+    _validate_amount = _split_amount
+
 class ATM:
 
 
     TRANSACTIONS_CSV = CONFIG["TRANSACTIONS_CSV"]
     TRANSACTION_FIELDS = ["account_number", "type", "amount", "target_account", "status", "timestamp"]
+    TRANSACTION_SYNC_ROWS = 32
+    UNSAFE_CSV_CHARS = frozenset(',"\r\n')
 
     def __init__(self):
-        self.user_manager = User()
-        self._init_transactions_csv()
+        self._txn_path = Path(self.TRANSACTIONS_CSV).resolve()
+        self.user_manager: Optional[User] = None
+        self._txn_index: Dict[str, List[Tuple[str, ...]]] = {}
+        self._txn_fh = None
+        self._pending_txns = 0
+        self._ts_cache = (0, "")
 
-    def _get_transaction_file_path(self) -> str:
-        return self.TRANSACTIONS_CSV
+    def _open_storage(self) -> None:
+        self.user_manager = User()
+        if not self._load_transaction_index():
+            self._init_transactions_csv()
+        self._txn_fh = self._open_transaction_log()
 
     def _init_transactions_csv(self) -> None:
-        if not User.CSVUtils.initialize_csv(self.TRANSACTIONS_CSV, self.TRANSACTION_FIELDS):
-            exit(1)
+        if not User.CSVUtils.initialize_csv(self._txn_path, self.TRANSACTION_FIELDS):
+            raise OSError(f"Unable to initialize {self._txn_path}")
+
+    def _load_transaction_index(self) -> bool:
+        if not (os.path.isfile(self._txn_path) and os.path.getsize(self._txn_path) > 0):
+            return False
+
+        def operation():
+            index = {}
+            with open(self._txn_path, "r", newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, None) or []
+                if not all(field in header for field in self.TRANSACTION_FIELDS):
+                    return False, None
+                positions = [header.index(field) for field in self.TRANSACTION_FIELDS]
+                in_order = positions == list(range(len(self.TRANSACTION_FIELDS)))
+                for row in reader:
+                    if len(row) < len(header):
+                        if row:
+                            print(f"⚠️ Skipping malformed transaction row: {row}")
+                        continue
+                    row = tuple(row) if in_order else tuple(row[position] for position in positions)
+                    index.setdefault(row[ACCT_IDX], []).append(row)
+            return True, index
+        success, result = User.CSVUtils.safe_csv_operation(self._txn_path, operation)
+        if not success:
+            if result:
+                print(result)
+            return False
+        self._txn_index = result
+        print(f"✅ {self._txn_path} already exists and is valid.")
+        return True
+
+    def _open_transaction_log(self):
+        if CONFIG["IO_BACKEND"] == "io_uring":
+            try:
+                return UringAppender(self._txn_path)
+            except OSError as e:
+                print(f"⚠️ io_uring unavailable ({e}), using direct writes.")
+        return FdAppender(self._txn_path)
+
+    def _drain_transactions(self) -> None:
+        if isinstance(self._txn_fh, UringAppender):
+            success, message = User.CSVUtils.safe_csv_operation(self._txn_path, self._txn_fh.drain)
+            if not success:
+                print(message)
+
+    def _flush_transactions(self) -> None:
+        def operation():
+            if self._txn_fh is None or self._txn_fh.closed:
+                return True, "✅ Transactions already closed"
+            self._txn_fh.flush()
+            os.fsync(self._txn_fh.fileno())
+            self._pending_txns = 0
+            return True, "✅ Transactions flushed"
+        success, message = User.CSVUtils.safe_csv_operation(self._txn_path, operation)
+        if not success:
+            print(message)
+
+    def close(self) -> None:
+        if self._txn_fh is None:
+            return
+        self._flush_transactions()
+        self._txn_fh.close()
+
+    def _now_str(self) -> str:
+        now = int(time.time())
+        cached_second, cached_text = self._ts_cache
+        return cached_text if cached_second == now else self._refresh_ts(now)
+
+    def _refresh_ts(self, now: int) -> str:
+        text = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        self._ts_cache = (now, text)
+        return text
+
+    def _can_log(self, *fields: str) -> bool:
+        if self.UNSAFE_CSV_CHARS.isdisjoint("".join(fields)):
+            return True
+        print("❌ Account numbers with commas, quotes or newlines cannot be logged.")
+        return False
 
     def _log_transaction(self, account_number: str, trans_type: str, amount: float,
-                        target_account: str = "", status: str = "") -> None:
+                        target_account: str = "", status: str = "", sync: bool = True) -> None:
         def operation():
-            transaction_file = self._get_transaction_file_path()
-            if not os.path.isfile(transaction_file) or os.path.getsize(transaction_file) == 0:
-                User.CSVUtils.initialize_csv(transaction_file, self.TRANSACTION_FIELDS)
-            with open(transaction_file, "a", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=self.TRANSACTION_FIELDS)
-                writer.writerow({
-                    "account_number": account_number,
-                    "type": trans_type,
-                    "amount": amount,
-                    "target_account": target_account,
-                    "status": status,
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                })
+            row = (account_number, trans_type, f"{amount:.2f}", target_account, status, self._now_str())
+            self._txn_fh.write(",".join(row) + "\r\n")
+            self._txn_fh.submit()
+            self._txn_index.setdefault(row[ACCT_IDX], []).append(row)
+            self._pending_txns += 1
             return True, "✅ Transaction logged"
-        success, message = User.CSVUtils.safe_csv_operation(self.TRANSACTIONS_CSV, operation)
+        success, message = User.CSVUtils.safe_csv_operation(self._txn_path, operation)
         if not success:
             print(message)
+        elif sync and self._pending_txns >= self.TRANSACTION_SYNC_ROWS:
+            self._flush_transactions()
+
+    @staticmethod
+    def _parse_amount(amount: str) -> Optional[float]:
+        value = _validate_amount(amount)
+        return None if value < 0 else value
 
     def _prompt_account_number(self) -> str:
         return input("Enter account number: ").strip()
@@ -120,10 +256,11 @@ class ATM:
                 if not amount:
                     print("❌ Deposit cancelled.")
                     return
-                if not re.match(r"^\d+(\.\d{1,2})?$", amount):
+                parsed_amount = self._parse_amount(amount)
+                if parsed_amount is None:
                     print("❌ Invalid amount format. Use numbers (e.g., 10 or 10.50).")
                     continue
-                amount = float(amount)
+                amount = parsed_amount
                 if amount <= 0:
                     print("❌ Amount must be positive.")
                     continue
@@ -132,6 +269,8 @@ class ATM:
                     continue
                 current_balance = float(user.get("balance", "0.0"))
                 new_balance = current_balance + amount
+                if not self._can_log(user["account_number"]):
+                    return
                 success, message = self.user_manager.update_balance(user["account_number"], new_balance)
                 if not success:
                     print(message)
@@ -157,10 +296,11 @@ class ATM:
                 if not amount:
                     print("❌ Withdrawal cancelled.")
                     return
-                if not re.match(r"^\d+(\.\d{1,2})?$", amount):
+                parsed_amount = self._parse_amount(amount)
+                if parsed_amount is None:
                     print("❌ Invalid amount format. Use numbers (e.g., 10 or 10.50).")
                     continue
-                amount = float(amount)
+                amount = parsed_amount
                 if amount <= 0:
                     print("❌ Amount must be positive.")
                     continue
@@ -172,6 +312,8 @@ class ATM:
                     print("❌ Insufficient balance.")
                     continue
                 new_balance = current_balance - amount
+                if not self._can_log(user["account_number"]):
+                    return
                 success, message = self.user_manager.update_balance(user["account_number"], new_balance)
                 if not success:
                     print(message)
@@ -211,10 +353,11 @@ class ATM:
                 if not amount:
                     print("❌ Transfer cancelled.")
                     return
-                if not re.match(r"^\d+(\.\d{1,2})?$", amount):
+                parsed_amount = self._parse_amount(amount)
+                if parsed_amount is None:
                     print("❌ Invalid amount format. Use numbers (e.g., 10 or 10.50).")
                     continue
-                amount = float(amount)
+                amount = parsed_amount
                 if amount <= 0:
                     print("❌ Amount must be positive.")
                     continue
@@ -225,16 +368,14 @@ class ATM:
                 if amount > current_balance:
                     print("❌ Insufficient balance.")
                     continue
-                success, message = self.user_manager.update_balance(user["account_number"], current_balance - amount)
-                if not success:
-                    print(message)
+                if not self._can_log(user["account_number"], target_account):
                     return
-                target_balance = float(target_user.get("balance", "0.0"))
-                success, message = self.user_manager.update_balance(target_account, target_balance + amount)
+                success, message = self.user_manager.transfer(user["account_number"], target_account, amount)
                 if not success:
                     print(message)
                     return
-                self._log_transaction(user["account_number"], "Transfer", amount, target_account, "Debit")
+                self._log_transaction(user["account_number"], "Transfer", amount, target_account, "Debit",
+                                      sync=False)
                 self._log_transaction(target_account, "Transfer", amount, user["account_number"], "Credit")
                 print(f"✅ Transferred {amount:.2f} to account {target_account}")
                 break
@@ -279,37 +420,20 @@ class ATM:
             print(f"❌ Account deletion failed: {e}")
 
     def view_transactions(self, user: Dict) -> None:
-        transaction_file = self._get_transaction_file_path()
-        def operation():
-            print("\n--- Transaction History ---")
-            found = False
-            with open(transaction_file, "r", newline="") as f:
-                reader = csv.DictReader(f)
-                if not all(field in reader.fieldnames for field in self.TRANSACTION_FIELDS):
-                    return False, f"❌ Invalid transaction file structure. Please reinitialize {transaction_file}"
-                for row in reader:
-                    if not all(field in row for field in self.TRANSACTION_FIELDS):
-                        print(f"⚠️ Skipping malformed transaction row: missing fields {set(self.TRANSACTION_FIELDS) - set(row.keys())}")
-                        continue
-                    if row["account_number"] == user["account_number"]:
-                        target = row.get("target_account", "") or "-"
-                        try:
-                            amount = float(row["amount"])
-                            print(f"{row['timestamp']} | {row['type']} | {amount:.2f} | {target} | {row['status']}")
-                            found = True
-                        except ValueError as e:
-                            print(f"⚠️ Skipping invalid transaction: invalid amount '{row['amount']}' ({e})")
-                            continue
-                        except Exception as e:
-                            print(f"⚠️ Skipping invalid transaction: {e}")
-                            continue
-            if not found:
-                print("📜 No transactions found.")
-            return True, "✅ Transaction history displayed"
-        success, message = User.CSVUtils.safe_csv_operation(transaction_file, operation)
-        if not success and "not found" not in message.lower():
-            print(message)
-        elif not success:
+        print("\n--- Transaction History ---")
+        found = False
+        for row in self._txn_index.get(user["account_number"], []):
+            try:
+                amount = float(row[AMOUNT_IDX])
+                print(f"{row[TIMESTAMP_IDX]} | {row[TYPE_IDX]} | {amount:.2f} | {row[TARGET_IDX] or '-'} | {row[STATUS_IDX]}")
+                found = True
+            except ValueError as e:
+                print(f"⚠️ Skipping invalid transaction: invalid amount '{row[AMOUNT_IDX]}' ({e})")
+                continue
+            except Exception as e:
+                print(f"⚠️ Skipping invalid transaction: {e}")
+                continue
+        if not found:
             print("📜 No transactions found.")
 
     def _display_menu(self) -> None:
@@ -353,6 +477,7 @@ class ATM:
     def main_menu(self, user: Dict) -> None:
         while True:
             try:
+                self._drain_transactions()
                 self._display_menu()
                 choice = input("Choose (1-8): ").strip()
                 user = self._handle_menu_choice(user, choice)
@@ -363,13 +488,22 @@ class ATM:
                 break
             except Exception as e:
                 print(f"❌ Menu error: {e}")
+        self._flush_transactions()
 
     def start(self) -> None:
-        while True:
-            user = self.login()
-            if user:
-                self.main_menu(user)
-                break
+        try:
+            self._open_storage()
+        except OSError as e:
+            print(f"❌ {e}")
+            return
+        try:
+            while True:
+                user = self.login()
+                if user:
+                    self.main_menu(user)
+                    break
+        finally:
+            self.close()
 
 if __name__ == "__main__":
     atm = ATM()
@@ -0,0 +1,124 @@
+import errno
+import os
+from typing import Dict, Union
+
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
+# Windows translates "\n" on descriptors opened without O_BINARY.
+O_BINARY = getattr(os, "O_BINARY", 0)
+
+class FdAppender:
+    def __init__(self, file_path: Union[str, os.PathLike]):
+        self._fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | O_BINARY, 0o644)
+        self.closed = False
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def write(self, data: str) -> int:
+        payload = memoryview(data.encode("utf-8"))
+        while payload:
+            payload = payload[os.write(self._fd, payload):]
+        return len(data)
+
+    def submit(self) -> None:
+        # write() hands every row to the OS, so there is nothing queued.
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        os.close(self._fd)
+        self.closed = True
+
+class UringAppender:
+    RING_ENTRIES = 64
+
+    def __init__(self, file_path: Union[str, os.PathLike]):
+        if liburing is None:
+            raise OSError("liburing is not installed")
+        self._fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | O_BINARY, 0o644)
+        try:
+            self._ring = liburing.Ring()
+            self._cqe = liburing.Cqe()
+            liburing.io_uring_queue_init(self.RING_ENTRIES, self._ring)
+        except Exception:
+            os.close(self._fd)
+            raise
+        try:
+            liburing.io_uring_register_files(self._ring, liburing.FileIndex([self._fd]))
+            self._target, self._sqe_flags = 0, liburing.IOSQE_FIXED_FILE
+        except OSError:
+            self._target, self._sqe_flags = self._fd, 0
+        self._offset = os.fstat(self._fd).st_size
+        self._inflight: Dict[int, bytes] = {}
+        self._unsubmitted = 0
+        self._next_id = 0
+        self.closed = False
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def write(self, data: str) -> int:
+        payload = data.encode("utf-8")
+        sqe = liburing.io_uring_get_sqe(self._ring)
+        if not sqe:
+            self.flush()
+            sqe = liburing.io_uring_get_sqe(self._ring)
+            if not sqe:
+                raise OSError(errno.EBUSY, "io_uring submission queue is full")
+        liburing.io_uring_prep_write(sqe, self._target, payload, self._offset)
+        sqe.flags |= self._sqe_flags
+        liburing.io_uring_sqe_set_data64(sqe, self._next_id)
+        self._inflight[self._next_id] = payload
+        self._next_id += 1
+        self._offset += len(payload)
+        self._unsubmitted += 1
+        return len(data)
+
+    def submit(self) -> None:
+        if self._unsubmitted:
+            liburing.io_uring_submit(self._ring)
+            self._unsubmitted = 0
+
+    def _reap(self, wait: bool) -> None:
+        while self._inflight:
+            try:
+                if wait:
+                    liburing.io_uring_wait_cqe(self._ring, self._cqe)
+                else:
+                    liburing.io_uring_peek_cqe(self._ring, self._cqe)
+            except BlockingIOError:
+                return
+            cqe = self._cqe[0]
+            result, user_data = cqe.res, cqe.user_data
+            liburing.io_uring_cqe_seen(self._ring, cqe)
+            payload = self._inflight.pop(user_data, b"")
+            if result < 0:
+                raise OSError(-result, os.strerror(-result))
+            if result != len(payload):
+                raise OSError(errno.EIO, "Short write to transaction log")
+
+    def drain(self) -> None:
+        self.submit()
+        self._reap(wait=False)
+
+    def flush(self) -> None:
+        self.submit()
+        self._reap(wait=True)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            liburing.io_uring_queue_exit(self._ring)
+            os.close(self._fd)
+            self.closed = True
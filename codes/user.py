@@ -1,25 +1,32 @@
 import csv
 import hashlib
+import io
 import os
-from typing import List, Dict, Optional, Tuple, Callable
+from itertools import accumulate
+from pathlib import Path
+from typing import List, Dict, Optional, Set, Tuple, Callable, Union
+
+CSV_DIR = Path(__file__).resolve().parent.parent / "CSV_files"
 
 CONFIG = {
-    "USERS_CSV": "/home/lenovo/PycharmProjects/PythonProject1/CSV_files/users.csv",
-    "TRANSACTIONS_CSV": "/home/lenovo/PycharmProjects/PythonProject1/CSV_files/transactions.csv"
+    "USERS_CSV": CSV_DIR / "users.csv",
+    "TRANSACTIONS_CSV": CSV_DIR / "transactions.csv",
+    "IO_BACKEND": "stdlib"
 }
 
 class CSVUtils:
     @staticmethod
-    def validate_csv_headers(file_path: str, required_fields: List[str]) -> bool:
+    def validate_csv_headers(file_path: Union[str, os.PathLike], required_fields: List[str]) -> bool:
         try:
             with open(file_path, "r", newline="") as f:
-                reader = csv.DictReader(f)
-                return all(field in reader.fieldnames for field in required_fields)
+                header = next(csv.reader(f), [])
+                return all(field in header for field in required_fields)
         except (PermissionError, OSError, csv.Error):
             return False
 
     @staticmethod
-    def initialize_csv(file_path: str, fieldnames: List[str], initial_data: Optional[List[Dict]] = None) -> bool:
+    def initialize_csv(file_path: Union[str, os.PathLike], fieldnames: List[str],
+                       initial_data: Optional[List[Dict]] = None) -> bool:
         try:
             if os.path.isfile(file_path) and os.path.getsize(file_path) > 0:
                 if CSVUtils.validate_csv_headers(file_path, fieldnames):
@@ -43,7 +50,8 @@ class CSVUtils:
             return False
 
     @staticmethod
-    def safe_csv_operation(file_path: str, operation: Callable, *args, **kwargs) -> Tuple[bool, str | Dict]:
+    def safe_csv_operation(file_path: Union[str, os.PathLike], operation: Callable,
+                           *args, **kwargs) -> Tuple[bool, str | Dict]:
         try:
             result = operation(*args, **kwargs)
             if isinstance(result, tuple):
@@ -60,38 +68,44 @@ class User:
     USERS_CSV = CONFIG["USERS_CSV"]
     USER_FIELDS = ["name", "account_number", "pin", "address", "balance", "is_deleted"]
     CSVUtils = CSVUtils  # Explicitly bind CSVUtils to User class
+    BALANCE_WIDTH = 16
+    _PIN_HASH_TABLE = {f"{i:04d}": hashlib.sha256(f"{i:04d}".encode()).hexdigest() for i in range(10000)}
 
     def __init__(self):
+        self._rows: List[Dict] = []
+        self._users: Dict[str, Dict] = {}
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._pin_index: Dict[str, Set[str]] = {}
         self._init_users_csv()
+        self._load_users()
 
     def _hash_pin(self, pin: str) -> Optional[str]:
-        try:
-            return hashlib.sha256(pin.encode()).hexdigest()
-        except ValueError as e:
-            print(f"❌ Error hashing PIN: {e}")
-            return None
+        return self._PIN_HASH_TABLE.get(pin)
 
     def _is_valid_pin(self, pin: str) -> bool:
-        return bool(pin.isdigit() and len(pin) == 4)
+        encoded = pin.encode()
+        if len(encoded) != 4:
+            return False
+        digits = int.from_bytes(encoded, "little") - 0x30303030
+        return (digits | (digits + 0x06060606)) & 0xF0F0F0F0 == 0
 
     def _is_pin_unique(self, account_number: str, new_pin: str) -> bool:
         hashed_new_pin = self._hash_pin(new_pin)
         if not hashed_new_pin:
             return False
-        def operation():
-            with open(self.USERS_CSV, "r", newline="") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if (row["account_number"] != str(account_number) and
-                        row["pin"] == hashed_new_pin and
-                        row.get("is_deleted", "0") == "0"):
-                        return False
-            return True
-        success, result = self.CSVUtils.safe_csv_operation(self.USERS_CSV, operation)
-        if not success:
-            print(result)
-            return False
-        return bool(result)
+        owners = self._pin_index.get(hashed_new_pin, set())
+        return owners <= {str(account_number)}
+
+    def _index_pin(self, row: Dict) -> None:
+        if row["is_deleted"] == "0":
+            self._pin_index.setdefault(row["pin"], set()).add(row["account_number"])
+
+    def _unindex_pin(self, row: Dict) -> None:
+        owners = self._pin_index.get(row["pin"])
+        if owners is not None:
+            owners.discard(row["account_number"])
+            if not owners:
+                del self._pin_index[row["pin"]]
 
     def _init_users_csv(self) -> None:
         initial_data = [
@@ -113,61 +127,192 @@ class User:
             }
         ]
         if not self.CSVUtils.initialize_csv(self.USERS_CSV, self.USER_FIELDS, initial_data):
-            exit(1)
+            raise OSError(f"Unable to initialize {self.USERS_CSV}")
 
-    def find_user(self, account_number: str, include_deleted: bool = False) -> Optional[Dict]:
+    def _load_users(self) -> None:
         def operation():
-            with open(self.USERS_CSV, "r", newline="") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row["account_number"] == account_number:
-                        try:
-                            row["balance"] = str(float(row.get("balance", "0.0")))
-                        except ValueError:
-                            row["balance"] = "0.0"
-                        row["is_deleted"] = row.get("is_deleted", "0")
-                        if include_deleted or row["is_deleted"] == "0":
-                            return True, row
-                return False, "User not found"
+            with open(self.USERS_CSV, "rb") as f:
+                raw = f.read()
+            records = csv.reader(io.StringIO(raw.decode("utf-8"), newline=""))
+            header = next(records, [])
+            lines = raw.split(b"\r\n")
+            in_place = lines[0] == ",".join(self.USER_FIELDS).encode() and lines[-1] == b""
+            position = len(lines[0]) + 2 if in_place else 0
+            width = self.BALANCE_WIDTH
+            rows, starts, users = [], [], {}
+            for index, values in enumerate(records, start=1):
+                if not values:
+                    in_place = False
+                    continue
+                row = dict(zip(header, values))
+                if len(values) < len(header):
+                    row.update(dict.fromkeys(header[len(values):]))
+                    in_place = False
+                balance = row.get("balance", "0.0")
+                try:
+                    amount = float(balance)
+                except (TypeError, ValueError):
+                    amount = 0.0
+                    in_place = False
+                row["balance"] = str(amount)
+                is_deleted = row["is_deleted"] = row.get("is_deleted", "0")
+                rows.append(row)
+                existing = users.get(row["account_number"])
+                if existing is None or (existing["is_deleted"] != "0" and is_deleted == "0"):
+                    users[row["account_number"]] = row
+                if in_place:
+                    line = lines[index]
+                    if (not line.endswith(f",{balance},{is_deleted}".encode("utf-8")) or
+                            balance != f"{amount:0{width}.2f}"):
+                        in_place = False
+                    starts.append(position)
+                    position += len(line) + 2
+            starts.append(position)
+            self._rows = rows
+            self._users = users
+            self._pin_index = {}
+            for account_number, row in users.items():
+                if row["is_deleted"] == "0":
+                    self._pin_index.setdefault(row["pin"], set()).add(account_number)
+            if in_place and len(rows) == len(lines) - 2:
+                self._offsets = self._line_spans(starts)
+            else:
+                self._flush()
+            return True, "✅ Users loaded"
         success, result = self.CSVUtils.safe_csv_operation(self.USERS_CSV, operation)
         if not success:
-            if isinstance(result, str) and "not found" in result.lower():
-                print(f"❌ {self.USERS_CSV} not found. Reinitializing...")
-                self._init_users_csv()
-                return self.find_user(account_number, include_deleted)
             print(result)
+            raise OSError(f"Unable to load {self.USERS_CSV}")
+
+    def _line_spans(self, starts: List[int]) -> Dict[str, Tuple[int, int]]:
+        return {row["account_number"]: (start, end - 2)
+                for row, start, end in zip(self._rows, starts, starts[1:])
+                if self._users[row["account_number"]] is row}
+
+    @staticmethod
+    def _locate_slots(line: bytes, position: int) -> Dict[str, Tuple[int, int]]:
+        slots = {}
+        last = line.rfind(b",")
+        previous = line.rfind(b",", 0, last)
+        if previous >= 0 and b'"' not in line[previous:]:
+            slots["balance"] = (position + previous + 1, last - previous - 1)
+            slots["is_deleted"] = (position + last + 1, len(line) - last - 1)
+        second = line.find(b",", line.find(b",") + 1)
+        third = line.find(b",", second + 1)
+        if second >= 0 and third >= 0 and b'"' not in line[:third]:
+            slots["pin"] = (position + second + 1, third - second - 1)
+        return slots
+
+    def _slot_value(self, field: str, value: str) -> Optional[bytes]:
+        if field == "balance":
+            value = f"{float(value):0{self.BALANCE_WIDTH}.2f}"
+        if any(char in value for char in ',"\r\n'):
             return None
-        if isinstance(result, dict):
-            return result
-        return None
+        return value.encode("utf-8")
+
+    def _encode_users(self) -> Tuple[bytes, Dict[str, Tuple[int, int]]]:
+        width = self.BALANCE_WIDTH
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.USER_FIELDS)
+        writer.writerows((row.get("name") or "", row.get("account_number") or "", row.get("pin") or "",
+                          row.get("address") or "", f"{float(row['balance']):0{width}.2f}", row["is_deleted"])
+                         for row in self._rows)
+        data = buffer.getvalue().encode("utf-8")
+        lines = data.split(b"\r\n")
+        if len(lines) != len(self._rows) + 2:
+            return data, {}
+        return data, self._line_spans(list(accumulate(len(line) + 2 for line in lines[:-1])))
+
+    def _flush(self) -> None:
+        data, offsets = self._encode_users()
+        with open(self.USERS_CSV, "wb") as f:
+            f.write(data)
+        self._offsets = offsets
+
+    def _write_fixed_fields(self, changes: Dict[str, Dict[str, str]]) -> bool:
+        writes = []
+        with open(self.USERS_CSV, "r+b", buffering=0) as f:
+            for account_number, fields in changes.items():
+                span = self._offsets.get(account_number)
+                if span is None:
+                    return False
+                f.seek(span[0])
+                slots = self._locate_slots(f.read(span[1] - span[0]), span[0])
+                for field, value in fields.items():
+                    encoded = self._slot_value(field, value)
+                    slot = slots.get(field)
+                    if encoded is None or slot is None or slot[1] != len(encoded):
+                        return False
+                    writes.append((slot[0], encoded))
+            for offset, encoded in writes:
+                f.seek(offset)
+                f.write(encoded)
+        return True
+
+    def _commit_many(self, changes: Dict[str, Dict[str, str]]) -> None:
+        rows = {account_number: self._users[account_number] for account_number in changes}
+        previous = {account_number: {field: rows[account_number][field] for field in fields}
+                    for account_number, fields in changes.items()}
+        for account_number, fields in changes.items():
+            self._unindex_pin(rows[account_number])
+            rows[account_number].update(fields)
+        try:
+            if not self._write_fixed_fields(changes):
+                self._flush()
+        except Exception:
+            for account_number, fields in previous.items():
+                rows[account_number].update(fields)
+            # Part of the change may already be on disk; rewrite it from the restored cache.
+            try:
+                self._flush()
+            except OSError:
+                pass
+            raise
+        finally:
+            for row in rows.values():
+                self._index_pin(row)
+
+    def _commit(self, account_number: str, **changes: str) -> None:
+        self._commit_many({account_number: changes})
+
+    def find_user(self, account_number: str, include_deleted: bool = False) -> Optional[Dict]:
+        user = self._users.get(account_number)
+        if user is None or not (include_deleted or user["is_deleted"] == "0"):
+            return None
+        return dict(user)
 
     def update_balance(self, account_number: str, new_balance: float) -> Tuple[bool, str]:
         def operation():
-            user = self.find_user(account_number, include_deleted=True)
+            user = self._users.get(account_number)
             if not user:
                 return False, "❌ User not found."
             if user["is_deleted"] == "1":
                 return False, "❌ Cannot update balance for deleted user."
-            users = []
-            with open(self.USERS_CSV, "r", newline="") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row["account_number"] == account_number:
-                        row["balance"] = str(new_balance)
-                    else:
-                        try:
-                            row["balance"] = str(float(row.get("balance", "0.0")))
-                        except ValueError:
-                            row["balance"] = "0.0"
-                    row["is_deleted"] = row.get("is_deleted", "0")
-                    users.append(row)
-            with open(self.USERS_CSV, "w", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=self.USER_FIELDS)
-                writer.writeheader()
-                writer.writerows(users)
+            self._commit(account_number, balance=str(round(new_balance, 2)))
             return True, "✅ Balance updated."
         return self.CSVUtils.safe_csv_operation(self.USERS_CSV, operation)
 
+    def transfer(self, source_account: str, target_account: str, amount: float) -> Tuple[bool, str]:
+        def operation():
+            source = self._users.get(source_account)
+            target = self._users.get(target_account)
+            if not source or not target:
+                return False, "❌ User not found."
+            if source_account == target_account:
+                return False, "❌ Cannot transfer to your own account."
+            if source["is_deleted"] == "1" or target["is_deleted"] == "1":
+                return False, "❌ Cannot transfer to or from a deleted user."
+            source_balance = float(source["balance"])
+            if amount > source_balance:
+                return False, "❌ Insufficient balance."
+            self._commit_many({
+                source_account: {"balance": str(round(source_balance - amount, 2))},
+                target_account: {"balance": str(round(float(target["balance"]) + amount, 2))}
+            })
+            return True, "✅ Transfer completed."
+        return self.CSVUtils.safe_csv_operation(self.USERS_CSV, operation)
+
     def change_pin(self, user: Dict, new_pin: str, confirm_pin: str, verify_current_pin: bool = True,
                    current_pin: Optional[str] = None) -> Tuple[bool, str]:
         def operation():
@@ -187,48 +332,19 @@ class User:
             hashed_new_pin = self._hash_pin(new_pin)
             if not hashed_new_pin:
                 return False, "❌ Failed to hash PIN."
-            users = []
-            with open(self.USERS_CSV, "r", newline="") as f:
-                reader = csv.DictReader(f)
-                users.extend(reader)
-            for row in users:
-                if row["account_number"] == user["account_number"]:
-                    row["pin"] = hashed_new_pin
-                    try:
-                        row["balance"] = str(float(row.get("balance", "0.0")))
-                    except ValueError:
-                        row["balance"] = "0.0"
-                row["is_deleted"] = row.get("is_deleted", "0")
-            with open(self.USERS_CSV, "w", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=self.USER_FIELDS)
-                writer.writeheader()
-                writer.writerows(users)
+            if user["account_number"] not in self._users:
+                return False, "❌ User not found."
+            self._commit(user["account_number"], pin=hashed_new_pin)
             return True, "✅ PIN changed successfully."
         return self.CSVUtils.safe_csv_operation(self.USERS_CSV, operation)
 
     def soft_delete_user(self, account_number: str) -> Tuple[bool, str]:
         def operation():
-            user = self.find_user(account_number, include_deleted=True)
+            user = self._users.get(account_number)
             if not user:
                 return False, "❌ User not found."
             if user["is_deleted"] == "1":
                 return False, "❌ User is already deleted."
-            users = []
-            with open(self.USERS_CSV, "r", newline="") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row["account_number"] == account_number:
-                        row["is_deleted"] = "1"
-                    else:
-                        row["is_deleted"] = row.get("is_deleted", "0")
-                    try:
-                        row["balance"] = str(float(row.get("balance", "0.0")))
-                    except ValueError:
-                        row["balance"] = "0.0"
-                    users.append(row)
-            with open(self.USERS_CSV, "w", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=self.USER_FIELDS)
-                writer.writeheader()
-                writer.writerows(users)
+            self._commit(account_number, is_deleted="1")
             return True, "✅ Account deleted successfully."
-        return self.CSVUtils.safe_csv_operation(self.USERS_CSV, operation)
\ No newline at end of file
+        return self.CSVUtils.safe_csv_operation(self.USERS_CSV, operation)
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from codes import txn_log
+from codes.txn_log import FdAppender, UringAppender
+
+class FdAppenderTest(unittest.TestCase):
+    def test_rows_reach_the_file_as_they_are_written(self):
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        appender = FdAppender(path)
+        self.addCleanup(appender.close)
+        appender.write("header\r\n")
+        appender.write("first\r\n")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"header\r\nfirst\r\n")
+
+@unittest.skipIf(txn_log.liburing is None, "liburing is not installed")
+class UringAppenderTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".csv")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        with open(self.path, "w", newline="") as f:
+            f.write("header\r\n")
+
+    def _open(self) -> UringAppender:
+        try:
+            return UringAppender(self.path)
+        except OSError as e:
+            self.skipTest(f"io_uring unavailable: {e}")
+
+    def test_appends_rows_in_order_past_a_full_ring(self):
+        appender = self._open()
+        rows = [f"row {i}\r\n" for i in range(UringAppender.RING_ENTRIES * 2 + 3)]
+        for row in rows:
+            appender.write(row)
+        appender.close()
+        with open(self.path, "r", newline="") as f:
+            self.assertEqual(f.read(), "header\r\n" + "".join(rows))
+
+    def test_submitted_rows_are_reaped_by_drain_and_flush(self):
+        appender = self._open()
+        self.addCleanup(appender.close)
+        rows = [f"row {i}\r\n" for i in range(5)]
+        for row in rows:
+            appender.write(row)
+            appender.submit()
+        appender.drain()
+        appender.flush()
+        self.assertEqual(appender._inflight, {})
+        with open(self.path, "r", newline="") as f:
+            self.assertEqual(f.read(), "header\r\n" + "".join(rows))
+
+    def test_flush_makes_rows_visible_before_close(self):
+        appender = self._open()
+        self.addCleanup(appender.close)
+        appender.write("first\r\n")
+        appender.flush()
+        with open(self.path, "r", newline="") as f:
+            self.assertEqual(f.read(), "header\r\nfirst\r\n")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import csv
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from codes.user import User
+
+HEADER = "name,account_number,pin,address,balance,is_deleted\r\n"
+PIN_1234 = User._PIN_HASH_TABLE["1234"]
+PIN_5678 = User._PIN_HASH_TABLE["5678"]
+
+class UserStorageTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "users.csv")
+        patcher = mock.patch.object(User, "USERS_CSV", self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        print_patcher = mock.patch("builtins.print")
+        print_patcher.start()
+        self.addCleanup(print_patcher.stop)
+
+    def _write(self, data: bytes) -> None:
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+    def _read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def _rows(self):
+        with open(self.path, "r", newline="") as f:
+            return list(csv.DictReader(f))
+
+    def _canonical(self) -> bytes:
+        return (HEADER +
+                f'"Rai, Saqlain",987654321,{PIN_1234},"123 ""Main"" St, Karachi",0000000002000.00,0\r\n'
+                f"Ahmed,123456789,{PIN_5678},456 Gulshan Ave,0000000000010.00,0\r\n").encode()
+
+    def test_truncated_row_does_not_stop_loading(self):
+        self._write(self._canonical() + b"Bob,555")
+        users = User()
+        self.assertEqual(users.find_user("987654321")["balance"], "2000.0")
+        self.assertIsNone(users.find_user("555"))
+        self.assertEqual(users.find_user("555", include_deleted=True)["pin"], None)
+        self.assertEqual(len(self._rows()), 3)
+
+    def test_canonical_file_is_not_rewritten_on_load(self):
+        self._write(self._canonical())
+        with mock.patch.object(User, "_flush") as flush:
+            User()
+        flush.assert_not_called()
+
+    def test_non_canonical_file_is_rewritten_on_load(self):
+        self._write((HEADER + f"Ahmed,123456789,{PIN_5678},x,10.5,0\r\n").encode())
+        User()
+        self.assertEqual(self._rows()[0]["balance"], "0000000000010.50")
+
+    def test_updates_are_written_in_place_next_to_quoted_fields(self):
+        self._write(self._canonical())
+        users = User()
+        with mock.patch.object(User, "_flush") as flush:
+            self.assertTrue(users.transfer("987654321", "123456789", 2.5)[0])
+            account = users.find_user("123456789")
+            self.assertTrue(users.change_pin(account, "4321", "4321", verify_current_pin=False)[0])
+            self.assertTrue(users.soft_delete_user("123456789")[0])
+        flush.assert_not_called()
+        rows = self._rows()
+        self.assertEqual((rows[0]["address"], rows[0]["balance"]), ('123 "Main" St, Karachi', "0000000001997.50"))
+        self.assertEqual((rows[1]["balance"], rows[1]["pin"], rows[1]["is_deleted"]),
+                         ("0000000000012.50", User._PIN_HASH_TABLE["4321"], "1"))
+
+    def test_pin_after_a_quoted_field_falls_back_to_a_rewrite(self):
+        self._write(self._canonical())
+        users = User()
+        account = users.find_user("987654321")
+        self.assertTrue(users.change_pin(account, "4321", "4321", verify_current_pin=False)[0])
+        self.assertEqual(self._rows()[0]["name"], "Rai, Saqlain")
+        self.assertEqual(User().find_user("987654321")["pin"], User._PIN_HASH_TABLE["4321"])
+
+    def test_balance_wider_than_its_slot_falls_back_to_a_rewrite(self):
+        self._write(self._canonical())
+        users = User()
+        self.assertTrue(users.update_balance("123456789", 10 ** 14)[0])
+        self.assertEqual(self._rows()[1]["balance"], "100000000000000.00")
+        self.assertEqual(User().find_user("123456789")["balance"], str(float(10 ** 14)))
+
+    def test_failed_transfer_restores_cache_and_file(self):
+        self._write(self._canonical())
+        users = User()
+        before = self._read()
+        write_fixed_fields = users._write_fixed_fields
+
+        def fail_after_first_row(changes):
+            write_fixed_fields(dict(list(changes.items())[:1]))
+            raise OSError("disk full")
+
+        with mock.patch.object(users, "_write_fixed_fields", fail_after_first_row):
+            self.assertFalse(users.transfer("987654321", "123456789", 5)[0])
+        self.assertEqual(users.find_user("987654321")["balance"], "2000.0")
+        self.assertEqual(self._read(), before)
+
+    def test_duplicate_rows_are_kept_and_first_active_one_wins(self):
+        self._write(self._canonical() + (
+            f"Old Ahmed,123456789,{PIN_1234},x,0000000000001.00,1\r\n").encode())
+        users = User()
+        self.assertTrue(users.update_balance("123456789", 20)[0])
+        rows = self._rows()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual((rows[1]["balance"], rows[2]["balance"]), ("0000000000020.00", "0000000000001.00"))
+
+if __name__ == "__main__":
+    unittest.main()